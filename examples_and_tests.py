@@ -311,6 +311,108 @@ loop_label:
     """)
 
 
+# Граничные случаи, на которых расходились пошаговый и автоматический режимы
+REGRESSION_CASES = [
+    # Выход за int64 и переход по отрицательному адресу
+    "mov eax 99999999999999999999\nadd eax 1",
+    "mov eax 1\nmov ecx 64\nmul eax 2\nsub ecx 1\njnz 2",
+    "mov eax 9223372036854775807\ninc eax\nmov ebx eax",
+    "mov eax -9223372036854775808\ndiv eax -1\nsub eax 1",
+    "mov eax 1\njmp -2",
+
+    # Ошибка внутри базового блока
+    "mov eax 4611686018427387904\nmul eax 4\nmov [0] eax\nmov ebx 7",
+
+    # Запись в ячейку значения вне int64
+    "mov eax 9223372036854775807\ninc eax\nmov [1] eax",
+    "mov [0] 99999999999999999999\nmov eax 1",
+
+    # Флаги при остановке по лимиту и на ошибке
+    "cmp eax eax\njmp 0",
+    "mov ecx 0\nsub ecx 9223372036854775807\nsub ecx 9\nmov [0] ecx\nsub ebx ebx",
+]
+
+# Лимиты команд: с запасом, внутри цикла и на первых командах
+ENGINE_LIMITS = (10000, 7, 3)
+
+# Повторный run_auto после остановки по лимиту должен продолжить программу
+RESUME_CASE = "mov ecx 100\nsub ecx 1\njnz 1\nmov eax 7"
+RESUME_LIMITS = (50, 1000)
+
+
+def emulator_state(emu):
+    """Состояние эмулятора, которое должно совпадать во всех режимах"""
+    error = emu.error_msg if emu.error_msg != "Превышен лимит команд" else None
+    memory = {int(a): int(emu.memory[a]) for a in emu.memory.nonzero()[0]}
+    return {
+        'regs': [int(r) for r in emu.regs],
+        'flags': (emu.flag_z, emu.flag_s),
+        'memory': memory,
+        'pc': emu.pc,
+        'executed_count': emu.executed_count,
+        'error': error,
+    }
+
+
+def run_engine(code, engine, max_steps):
+    """Выполнить программу: 'step' - execute_step, 'interp' - run_auto без
+    Numba, 'jit' - run_auto со скомпилированным циклом"""
+    from processor_emulator import Emulator
+    
+    emu = Emulator()
+    if not emu.parse_program(code):
+        return None
+    if engine == 'step':
+        steps = 0
+        while steps < max_steps and emu.execute_step():
+            steps += 1
+    else:
+        emu.use_compiled = engine == 'jit'
+        emu.run_auto(max_steps)
+    return emulator_state(emu)
+
+
+def check_engines():
+    """Сравнить пошаговый режим с автоматическим с Numba и без неё"""
+    from processor_emulator import Emulator, njit
+    
+    engines = ['step', 'interp'] + (['jit'] if njit is not None else [])
+    programs = [TASK_1_SUM_ARRAY, TASK_2_CONVOLUTION, EXAMPLE_FACTORIAL,
+                EXAMPLE_FIBONACCI, EXAMPLE_POWER, EXAMPLE_MAXIMUM,
+                EXAMPLE_PARITY_CHECK]
+    programs += [test['code'] for test in TEST_CASES] + REGRESSION_CASES
+    
+    failed = 0
+    for code in programs:
+        for max_steps in ENGINE_LIMITS:
+            expected = run_engine(code, 'step', max_steps)
+            for engine in engines[1:]:
+                actual = run_engine(code, engine, max_steps)
+                if actual != expected:
+                    failed += 1
+                    print(f"✗ {engine}, лимит {max_steps}: {code.strip().splitlines()[0]}")
+                    print(f"  step:    {expected}")
+                    print(f"  {engine}: {actual}")
+    
+    expected = run_engine(RESUME_CASE, 'step', sum(RESUME_LIMITS))
+    for engine in engines[1:]:
+        emu = Emulator()
+        emu.use_compiled = engine == 'jit'
+        emu.parse_program(RESUME_CASE)
+        results = [emu.run_auto(max_steps) for max_steps in RESUME_LIMITS]
+        actual = emulator_state(emu)
+        if results != [False, True] or emu.error_msg or actual != expected:
+            failed += 1
+            print(f"✗ {engine}, повторный запуск: {results}, {emu.error_msg}")
+            print(f"  step:    {expected}")
+            print(f"  {engine}: {actual}")
+    
+    total = (len(programs) * len(ENGINE_LIMITS) + 1) * (len(engines) - 1)
+    print(f"Режимы {', '.join(engines)}: совпало {total - failed} из {total}")
+    assert failed == 0, "режимы выполнения расходятся"
+
+
 if __name__ == '__main__':
     print("Примеры и тесты для эмулятора процессора")
     print_program_guide()
+    check_engines()
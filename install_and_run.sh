@@ -51,6 +51,28 @@ else
     exit 1
 fi
 
+# NumPy нужен для памяти эмулятора
+python3 -c "import numpy" 2>/dev/null
+if [ $? -eq 0 ]; then
+    echo "✓ NumPy доступен"
+else
+    echo "⚠ NumPy не найден"
+    echo ""
+    echo "Для установки NumPy выполните:"
+    echo "  pip install numpy"
+    echo ""
+    exit 1
+fi
+
+# Numba необязательна: без неё автоматическое выполнение медленнее
+python3 -c "import numba" 2>/dev/null
+if [ $? -eq 0 ]; then
+    echo "✓ Numba доступна"
+else
+    echo "ℹ Numba не найдена, автоматическое выполнение будет без компиляции"
+    echo "  (для ускорения: pip install numba)"
+fi
+
 echo ""
 echo "✓ Все зависимости установлены"
 echo ""
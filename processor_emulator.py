@@ -3,17 +3,210 @@ from tkinter import ttk, scrolledtext, messagebox
 import tkinter.font as tkFont
 from tklinenums import TkLineNumbers
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+import copy
 import re
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Без Numba run_auto выполняет программу интерпретатором на Python
+    njit = None
+
+MEMORY_SIZE = 4096
+
+# Диапазон int64: в нём работают скомпилированный цикл и ячейки памяти
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+# Шаблоны операндов: число и обращение к памяти [число] / [регистр]
+_INT_RE = re.compile(r'[-+]?\d+')
+_MEM_RE = re.compile(r'\[([-+]?\d+|eax|ebx|ecx|edx)\]')
+
+# Строка программы: команда, до двух операндов, лишние слова и комментарий
+# после ';' отбрасываются. Пустые строки и комментарии не совпадают.
+_LINE_RE = re.compile(r'^[^\S\n]*([^\s;]+)(?:[^\S\n]+([^\s;]+))?(?:[^\S\n]+([^\s;]+))?'
+                      r'[^\n;]*(?:;.*)?$', re.MULTILINE)
 
 
 @dataclass
 class Instruction:
     """Структура инструкции"""
+    # Слоты вместо __dict__ (dataclass(slots=True) требует Python 3.10+)
+    __slots__ = ('opcode', 'operand1', 'operand2', 'raw',
+                 'op_id', 'm1', 'v1', 'm2', 'v2',
+                 'get1', 'set1', 'get2', 'write_flags', 'target')
+    
     opcode: str
     operand1: str
     operand2: str
     raw: str
+    # Предекодированные поля: код операции и пары (режим, значение) операндов
+    op_id: int
+    m1: int
+    v1: int
+    m2: int
+    v2: int
+    # Слоты get1/set1/get2 - функции доступа к операндам, заполняются
+    # Emulator.bind_operands и не входят в поля dataclass. Слот write_flags
+    # сбрасывается только у копий в базовых блоках, если флаги не читаются
+    # (тогда результат сохраняется в Emulator.dead_result).
+    # Слот target - заранее вычисленный pc перехода (None для [eax], eax)
+
+
+@dataclass
+class BasicBlock:
+    """Линейный участок программы: ветвление может быть только последней командой"""
+    start: int
+    last: int
+    count: int    # число исходных команд (слитая пара считается за две)
+    ops: List[Tuple[Callable[[Instruction], None], Instruction]]
+    pcs: List[int]  # адрес исходной команды для каждой операции блока
+
+
+def _load(mode, value, regs, mem):
+    """Прочитать операнд байткода (режимы как в Emulator.ADDRESSING_MODES)"""
+    if mode == 0:
+        return regs[value]
+    if mode == 1:
+        return value
+    addr = regs[value] if mode == 2 else value
+    if 0 <= addr < mem.shape[0]:
+        return mem[addr]
+    return 0
+
+
+def _store(mode, value, result, regs, mem):
+    """Записать результат в операнд байткода"""
+    if mode == 0:
+        regs[value] = result
+    elif mode >= 2:
+        addr = regs[value] if mode == 2 else value
+        if 0 <= addr < mem.shape[0]:
+            mem[addr] = result
+
+
+# Проверки переполнения не выполняют саму переполняющую операцию:
+# LLVM считает знаковое переполнение невозможным и упрощает такие проверки
+
+def _add_overflows(a, b):
+    """Проверить, выходит ли a + b за пределы int64"""
+    return (b > 0 and a > INT64_MAX - b) or (b < 0 and a < INT64_MIN - b)
+
+
+def _sub_overflows(a, b):
+    """Проверить, выходит ли a - b за пределы int64"""
+    return (b < 0 and a > INT64_MAX + b) or (b > 0 and a < INT64_MIN + b)
+
+
+def _mul_overflows(a, b):
+    """Проверить, может ли a * b выйти за пределы int64.
+    
+    Оценка через float с запасом: спорные произведения около 2**63
+    считаются переполнением и вычисляются интерпретатором точно.
+    """
+    return abs(float(a) * float(b)) >= 9.0e18
+
+
+def _run_bytecode(op_ids, m1, v1, m2, v2, regs, mem, flags, pc, max_steps):
+    """Выполнить байткод до конца программы или лимита команд.
+    
+    Команда, результат которой не помещается в int64, не выполняется:
+    цикл останавливается на ней, и её выполняет интерпретатор на Python.
+    Так же цикл останавливается на отрицательном pc.
+    
+    Возвращает (pc, число выполненных команд, индекс последней команды).
+    """
+    n = op_ids.shape[0]
+    steps = 0
+    last = -1
+    while steps < max_steps and 0 <= pc < n:
+        op = op_ids[pc]
+        i = pc
+        
+        if op == 0:        # mov
+            _store(m1[i], v1[i], _load(m2[i], v2[i], regs, mem), regs, mem)
+        elif op == 1:      # add
+            a = _load(m1[i], v1[i], regs, mem)
+            b = _load(m2[i], v2[i], regs, mem)
+            if _add_overflows(a, b):
+                break
+            res = a + b
+            _store(m1[i], v1[i], res, regs, mem)
+            flags[0] = 1 if res == 0 else 0
+            flags[1] = 1 if res < 0 else 0
+        elif op == 2:      # sub
+            a = _load(m1[i], v1[i], regs, mem)
+            b = _load(m2[i], v2[i], regs, mem)
+            if _sub_overflows(a, b):
+                break
+            res = a - b
+            _store(m1[i], v1[i], res, regs, mem)
+            flags[0] = 1 if res == 0 else 0
+            flags[1] = 1 if res < 0 else 0
+        elif op == 3:      # mul
+            a = _load(m1[i], v1[i], regs, mem)
+            b = _load(m2[i], v2[i], regs, mem)
+            if _mul_overflows(a, b):
+                break
+            _store(m1[i], v1[i], a * b, regs, mem)
+        elif op == 4:      # div (с округлением к нулю)
+            divisor = _load(m2[i], v2[i], regs, mem)
+            if divisor != 0:
+                a = _load(m1[i], v1[i], regs, mem)
+                if a == INT64_MIN and divisor == -1:
+                    break
+                res = a // divisor
+                if a % divisor != 0 and (a < 0) != (divisor < 0):
+                    res += 1
+                _store(m1[i], v1[i], res, regs, mem)
+        elif 5 <= op <= 9:  # jmp, jz, jnz, js, jns
+            if (op == 5 or (op == 6 and flags[0]) or (op == 7 and not flags[0])
+                    or (op == 8 and flags[1]) or (op == 9 and not flags[1])):
+                target = _load(m1[i], v1[i], regs, mem)
+                if target == INT64_MIN:
+                    break
+                pc = target - 1
+        elif op == 10:     # and
+            res = _load(m1[i], v1[i], regs, mem) & _load(m2[i], v2[i], regs, mem)
+            _store(m1[i], v1[i], res, regs, mem)
+        elif op == 11:     # or
+            res = _load(m1[i], v1[i], regs, mem) | _load(m2[i], v2[i], regs, mem)
+            _store(m1[i], v1[i], res, regs, mem)
+        elif op == 12:     # xor
+            res = _load(m1[i], v1[i], regs, mem) ^ _load(m2[i], v2[i], regs, mem)
+            _store(m1[i], v1[i], res, regs, mem)
+        elif op == 13:     # not
+            _store(m1[i], v1[i], ~_load(m1[i], v1[i], regs, mem), regs, mem)
+        elif op == 14:     # cmp
+            a = _load(m1[i], v1[i], regs, mem)
+            b = _load(m2[i], v2[i], regs, mem)
+            if _sub_overflows(a, b):
+                break
+            res = a - b
+            flags[0] = 1 if res == 0 else 0
+            flags[1] = 1 if res < 0 else 0
+        else:              # inc
+            a = _load(m1[i], v1[i], regs, mem)
+            if a == INT64_MAX:
+                break
+            _store(m1[i], v1[i], a + 1, regs, mem)
+        
+        last = i
+        pc += 1
+        steps += 1
+    
+    return pc, steps, last
+
+
+if njit is not None:
+    _load = njit(cache=True)(_load)
+    _store = njit(cache=True)(_store)
+    _add_overflows = njit(cache=True)(_add_overflows)
+    _sub_overflows = njit(cache=True)(_sub_overflows)
+    _mul_overflows = njit(cache=True)(_mul_overflows)
+    _run_bytecode = njit(cache=True)(_run_bytecode)
 
 
 class Emulator:
@@ -38,6 +231,7 @@ class Emulator:
         'cmp': 0b1110,
         'inc': 0b1111
     }
+    OPCODE_NAMES = {code: name for name, code in OPCODES.items()}
     
     # Режимы адресации (2 бита)
     ADDRESSING_MODES = {
@@ -50,18 +244,46 @@ class Emulator:
     REG_NAMES = ['eax', 'ebx', 'ecx', 'edx']
     REG_MAP = {name: i for i, name in enumerate(REG_NAMES)}
     
+    # Команды передачи управления - завершают базовый блок
+    BRANCH_OPS = {OPCODES['jmp'], OPCODES['jz'], OPCODES['jnz'],
+                  OPCODES['js'], OPCODES['jns']}
+    FLAG_READERS = BRANCH_OPS - {OPCODES['jmp']}
+    FLAG_WRITERS = {OPCODES['add'], OPCODES['sub'], OPCODES['cmp']}
+    
+    # Псевдокоманда "sub reg 1; jnz target", существует только в блоках
+    DJNZ = 16
+    
+    # Разобранные строки программы, общие для всех эмуляторов. Инструкции
+    # из кэша не изменяются: блоки меняют только собственные копии
+    LINE_CACHE: Dict[str, Instruction] = {}
+    LINE_CACHE_SIZE = 4096
+    
     def __init__(self):
         """Инициализация эмулятора"""
+        # Таблица обработчиков команд, индексируемая op_id. Отсутствующий
+        # обработчик для кода из OPCODES даст ошибку уже при создании
+        self.dispatch = [None] * (1 << 4)
+        for op_id, name in self.OPCODE_NAMES.items():
+            self.dispatch[op_id] = getattr(self, f'_op_{name}')
+        # Двоичное представление зависит только от кода операции
+        self.encode_cache: Dict[int, str] = {}
+        # run_auto выполняет программу скомпилированным циклом, если есть Numba
+        self.use_compiled = njit is not None
         self.reset()
         
     def reset(self):
         """Сброс состояния эмулятора"""
-        self.registers = {'eax': 0, 'ebx': 0, 'ecx': 0, 'edx': 0}
-        self.flags = {'z': 0, 's': 0}  
+        self.regs = [0, 0, 0, 0]
+        self.flag_z = 0
+        self.flag_s = 0
+        self.dead_result = 0
         self.pc = 0  
         self.ir = None  
-        self.memory = {}  
+        self.memory = np.zeros(MEMORY_SIZE, dtype=np.int64)
         self.program = [] 
+        self.bytecode = None    # () - операнды программы не помещаются в int64
+        self.block_program = None
+        self.block_pc = None
         self.executed_count = 0
         self.running = False
         self.error_msg = None
@@ -69,25 +291,31 @@ class Emulator:
     def parse_program(self, code: str) -> bool:
         """Парсинг программы из ассемблерного кода"""
         self.reset()
-        lines = [l.strip() for l in code.split('\n')]
-        lines = [l for l in lines if l and not l.startswith(';')]
         
         self.program = []
-        for i, line in enumerate(lines):
+        for i, match in enumerate(_LINE_RE.finditer(code)):
             try:
-                parts = line.split()
-                if not parts:
-                    continue
+                line = match.group(0).strip()
+                inst = self.LINE_CACHE.get(line)
+                if inst is None:
+                    opcode = match.group(1).lower()
+                    if opcode not in self.OPCODES:
+                        self.error_msg = f"Строка {i+1}: Неизвестная команда '{opcode}'"
+                        return False
                     
-                opcode = parts[0].lower()
-                if opcode not in self.OPCODES:
-                    self.error_msg = f"Строка {i+1}: Неизвестная команда '{opcode}'"
-                    return False
+                    operand1 = match.group(2) or ''
+                    operand2 = match.group(3) or ''
+                    m1, v1 = self.decode_operand(operand1)
+                    m2, v2 = self.decode_operand(operand2)
                     
-                operand1 = parts[1] if len(parts) > 1 else ''
-                operand2 = parts[2] if len(parts) > 2 else ''
+                    inst = Instruction(opcode, operand1, operand2, line,
+                                       self.OPCODES[opcode], m1, v1, m2, v2)
+                    self.bind_operands(inst)
+                    if len(self.LINE_CACHE) >= self.LINE_CACHE_SIZE:
+                        self.LINE_CACHE.clear()
+                    self.LINE_CACHE[line] = inst
                 
-                self.program.append(Instruction(opcode, operand1, operand2, line))
+                self.program.append(inst)
                 
             except Exception as e:
                 self.error_msg = f"Строка {i+1}: {str(e)}"
@@ -97,181 +325,208 @@ class Emulator:
         self.pc = 0
         return True
     
+    @staticmethod
+    def check_cell_value(addr: int, value: int):
+        """Проверить, что значение помещается в 64-битную ячейку памяти"""
+        if not INT64_MIN <= value <= INT64_MAX:
+            raise OverflowError(f"значение {value} не помещается в ячейку [{addr}]")
+    
     def set_memory(self, addr: int, value: int):
         """Установить значение в памяти"""
-        if 0 <= addr < 4096:
+        if 0 <= addr < MEMORY_SIZE:
+            self.check_cell_value(addr, value)
             self.memory[addr] = value
     
     def get_memory(self, addr: int) -> int:
         """Получить значение из памяти"""
-        return self.memory.get(addr, 0)
+        if 0 <= addr < MEMORY_SIZE:
+            return int(self.memory[addr])
+        return 0
     
-    def get_value(self, operand: str) -> int:
-        """Получить значение операнда"""
-        operand = operand.strip()
-        
-        # Косвенно-регистровая адресация [eax]
-        if operand.startswith('[') and operand.endswith(']'):
-            addr_reg = operand[1:-1].strip()
-            if addr_reg in self.REG_MAP:
-                addr = self.registers[addr_reg]
-                return self.get_memory(addr)
-            else:
-                # Прямая адресация [123]
-                try:
-                    addr = int(addr_reg)
-                    return self.get_memory(addr)
-                except:
-                    return 0
-        
-        # Регистровая адресация
-        if operand in self.REG_MAP:
-            return self.registers[operand]
-        
-        # Непосредственная адресация (число)
-        try:
-            return int(operand)
-        except:
-            return 0
+    @staticmethod
+    def make_accessors(mode: int, value: int) -> Tuple[Callable, Callable]:
+        """Построить функции чтения и записи операнда под его режим адресации"""
+        if mode == 0:       # Регистровая (eax)
+            def get(emu):
+                return emu.regs[value]
+            def put(emu, result):
+                emu.regs[value] = result
+        elif mode == 1:     # Непосредственная (5)
+            def get(emu):
+                return value
+            def put(emu, result):
+                pass
+        elif mode == 2:     # Косвенно-регистровая ([eax])
+            def get(emu):
+                return emu.get_memory(emu.regs[value])
+            def put(emu, result):
+                emu.set_memory(emu.regs[value], result)
+        elif 0 <= value < MEMORY_SIZE:  # Прямая ([5]), адрес проверен заранее
+            def get(emu):
+                return int(emu.memory[value])
+            def put(emu, result):
+                emu.check_cell_value(value, result)
+                emu.memory[value] = result
+        else:               # Прямая за пределами памяти
+            def get(emu):
+                return 0
+            def put(emu, result):
+                pass
+        return get, put
     
-    def set_value(self, operand: str, value: int):
-        """Установить значение операнда"""
-        operand = operand.strip()
-        
-        # Косвенно-регистровая адресация [eax]
-        if operand.startswith('[') and operand.endswith(']'):
-            addr_reg = operand[1:-1].strip()
-            if addr_reg in self.REG_MAP:
-                addr = self.registers[addr_reg]
-                self.set_memory(addr, value)
-            else:
-                # Прямая адресация [123]
-                try:
-                    addr = int(addr_reg)
-                    self.set_memory(addr, value)
-                except:
-                    pass
-        
-        # Регистровая адресация
-        if operand in self.REG_MAP:
-            self.registers[operand] = value
+    def bind_operands(self, inst: Instruction):
+        """Привязать к инструкции функции доступа к её операндам"""
+        inst.get1, inst.set1 = self.make_accessors(inst.m1, inst.v1)
+        inst.get2 = self.make_accessors(inst.m2, inst.v2)[0]
+        inst.write_flags = True
+        if inst.m1 == self.ADDRESSING_MODES['imm']:
+            inst.target = inst.v1 - 1
+        else:
+            inst.target = None
     
     def update_flags(self, result: int):
         """Обновить флаги на основе результата"""
-        self.flags['z'] = 1 if result == 0 else 0
-        self.flags['s'] = 1 if result < 0 else 0
+        self.flag_z = 1 if result == 0 else 0
+        self.flag_s = 1 if result < 0 else 0
     
     def encode_instruction(self, inst: Instruction) -> str:
         """Кодирование инструкции в двоичный формат (40 бит)"""
-        opcode = self.OPCODES[inst.opcode]
-        binary = format(opcode, '04b')  # 4 бита
+        cached = self.encode_cache.get(inst.op_id)
+        if cached is not None:
+            return cached
+        
+        binary = format(inst.op_id, '04b')  # 4 бита
         
         # полное кодирование с адресациями
         binary += '|00.0000000000000000|00.0000000000000000'
         
+        self.encode_cache[inst.op_id] = binary
         return binary
     
-    def decode_operand(self, operand: str) -> Tuple[int, str]:
-        """Декодировать тип адресации и значение"""
+    def decode_operand(self, operand: str) -> Tuple[int, int]:
+        """Декодировать тип адресации и значение (номер регистра или число)"""
         operand = operand.strip()
         
-        if operand.startswith('[') and operand.endswith(']'):
-            inner = operand[1:-1].strip()
+        mem = _MEM_RE.fullmatch(operand)
+        if mem:
+            inner = mem.group(1)
             if inner in self.REG_MAP:
-                return self.ADDRESSING_MODES['ind'], inner
-            else:
-                return self.ADDRESSING_MODES['dir'], inner
+                return self.ADDRESSING_MODES['ind'], self.REG_MAP[inner]
+            return self.ADDRESSING_MODES['dir'], int(inner)
         
         if operand in self.REG_MAP:
-            return self.ADDRESSING_MODES['reg'], operand
+            return self.ADDRESSING_MODES['reg'], self.REG_MAP[operand]
         
-        try:
-            int(operand)
-            return self.ADDRESSING_MODES['imm'], operand
-        except:
-            return self.ADDRESSING_MODES['imm'], '0'
+        if _INT_RE.fullmatch(operand):
+            return self.ADDRESSING_MODES['imm'], int(operand)
+        
+        # Некорректный операнд читается как 0 и не записывается
+        return self.ADDRESSING_MODES['imm'], 0
+    
+    # Обработчики команд
+    
+    def _op_mov(self, inst: Instruction):
+        inst.set1(self, inst.get2(self))
+    
+    def _op_add(self, inst: Instruction):
+        res = inst.get1(self) + inst.get2(self)
+        inst.set1(self, res)
+        if inst.write_flags:
+            self.update_flags(res)
+        else:
+            self.dead_result = res
+    
+    def _op_sub(self, inst: Instruction):
+        res = inst.get1(self) - inst.get2(self)
+        inst.set1(self, res)
+        if inst.write_flags:
+            self.update_flags(res)
+        else:
+            self.dead_result = res
+    
+    def _op_mul(self, inst: Instruction):
+        res = inst.get1(self) * inst.get2(self)
+        inst.set1(self, res)
+    
+    def _op_div(self, inst: Instruction):
+        divisor = inst.get2(self)
+        if divisor != 0:
+            # Целочисленное деление с округлением к нулю, без перехода к float
+            a = inst.get1(self)
+            res = a // divisor
+            if a % divisor and (a ^ divisor) < 0:
+                res += 1
+            inst.set1(self, res)
+    
+    def _op_and(self, inst: Instruction):
+        res = inst.get1(self) & inst.get2(self)
+        inst.set1(self, res)
+    
+    def _op_or(self, inst: Instruction):
+        res = inst.get1(self) | inst.get2(self)
+        inst.set1(self, res)
+    
+    def _op_xor(self, inst: Instruction):
+        res = inst.get1(self) ^ inst.get2(self)
+        inst.set1(self, res)
+    
+    def _op_not(self, inst: Instruction):
+        inst.set1(self, ~inst.get1(self))
+    
+    def _op_inc(self, inst: Instruction):
+        inst.set1(self, inst.get1(self) + 1)
+    
+    def _op_cmp(self, inst: Instruction):
+        res = inst.get1(self) - inst.get2(self)
+        if inst.write_flags:
+            self.update_flags(res)
+        else:
+            self.dead_result = res
+    
+    def _op_djnz(self, inst: Instruction):
+        res = self.regs[inst.v1] - 1
+        self.regs[inst.v1] = res
+        if inst.write_flags:
+            self.update_flags(res)
+        else:
+            self.dead_result = res
+        if res != 0:
+            self.pc = inst.target if inst.target is not None else inst.get2(self) - 1
+    
+    def _op_jmp(self, inst: Instruction):
+        self.pc = inst.target if inst.target is not None else inst.get1(self) - 1
+    
+    def _op_jz(self, inst: Instruction):
+        if self.flag_z:
+            self.pc = inst.target if inst.target is not None else inst.get1(self) - 1
+    
+    def _op_jnz(self, inst: Instruction):
+        if not self.flag_z:
+            self.pc = inst.target if inst.target is not None else inst.get1(self) - 1
+    
+    def _op_js(self, inst: Instruction):
+        if self.flag_s:
+            self.pc = inst.target if inst.target is not None else inst.get1(self) - 1
+    
+    def _op_jns(self, inst: Instruction):
+        if not self.flag_s:
+            self.pc = inst.target if inst.target is not None else inst.get1(self) - 1
     
     def execute_step(self) -> bool:
         """Выполнить один шаг программы"""
         if not self.running or self.pc >= len(self.program):
             self.running = False
             return False
+        if self.pc < 0:
+            self.error_msg = f"Ошибка выполнения: переход на недопустимый адрес {self.pc}"
+            self.running = False
+            return False
         
         inst = self.program[self.pc]
         self.ir = inst
         
         try:
-            opcode = inst.opcode
-            op1 = inst.operand1
-            op2 = inst.operand2
-            
-            if opcode == 'mov':
-                val = self.get_value(op2)
-                self.set_value(op1, val)
-            
-            elif opcode == 'add':
-                res = self.get_value(op1) + self.get_value(op2)
-                self.set_value(op1, res)
-                self.update_flags(res)
-            
-            elif opcode == 'sub':
-                res = self.get_value(op1) - self.get_value(op2)
-                self.set_value(op1, res)
-                self.update_flags(res)
-            
-            elif opcode == 'mul':
-                res = self.get_value(op1) * self.get_value(op2)
-                self.set_value(op1, res)
-            
-            elif opcode == 'div':
-                divisor = self.get_value(op2)
-                if divisor != 0:
-                    res = int(self.get_value(op1) / divisor)
-                    self.set_value(op1, res)
-            
-            elif opcode == 'and':
-                res = self.get_value(op1) & self.get_value(op2)
-                self.set_value(op1, res)
-            
-            elif opcode == 'or':
-                res = self.get_value(op1) | self.get_value(op2)
-                self.set_value(op1, res)
-            
-            elif opcode == 'xor':
-                res = self.get_value(op1) ^ self.get_value(op2)
-                self.set_value(op1, res)
-            
-            elif opcode == 'not':
-                res = ~self.get_value(op1)
-                self.set_value(op1, res)
-            
-            elif opcode == 'inc':
-                res = self.get_value(op1) + 1
-                self.set_value(op1, res)
-            
-            elif opcode == 'cmp':
-                res = self.get_value(op1) - self.get_value(op2)
-                self.update_flags(res)
-            
-            elif opcode == 'jmp':
-                self.pc = self.get_value(op1) - 1
-            
-            elif opcode == 'jz':
-                if self.flags['z'] == 1:
-                    self.pc = self.get_value(op1) - 1
-            
-            elif opcode == 'jnz':
-                if self.flags['z'] == 0:
-                    self.pc = self.get_value(op1) - 1
-            
-            elif opcode == 'js':
-                if self.flags['s'] == 1:
-                    self.pc = self.get_value(op1) - 1
-            
-            elif opcode == 'jns':
-                if self.flags['s'] == 0:
-                    self.pc = self.get_value(op1) - 1
-            
+            self.dispatch[inst.op_id](inst)
             self.pc += 1
             self.executed_count += 1
             return True
@@ -281,13 +536,186 @@ class Emulator:
             self.running = False
             return False
     
+    def build_bytecode(self):
+        """Собрать параллельные массивы байткода для скомпилированного цикла"""
+        if not all(INT64_MIN <= inst.v1 <= INT64_MAX and INT64_MIN <= inst.v2 <= INT64_MAX
+                   for inst in self.program):
+            self.bytecode = ()
+            return
+        self.bytecode = (
+            np.array([inst.op_id for inst in self.program], dtype=np.int8),
+            np.array([inst.m1 for inst in self.program], dtype=np.int8),
+            np.array([inst.v1 for inst in self.program], dtype=np.int64),
+            np.array([inst.m2 for inst in self.program], dtype=np.int8),
+            np.array([inst.v2 for inst in self.program], dtype=np.int64),
+        )
+    
+    def can_run_compiled(self) -> bool:
+        """Проверить, что программа и регистры помещаются в int64"""
+        if self.bytecode is None:
+            self.build_bytecode()
+        return (self.bytecode != ()
+                and all(INT64_MIN <= r <= INT64_MAX for r in self.regs))
+    
+    def run_compiled(self, max_steps: int) -> int:
+        """Выполнить программу скомпилированным Numba циклом"""
+        regs = np.array(self.regs, dtype=np.int64)
+        flags = np.array([self.flag_z, self.flag_s], dtype=np.int64)
+        
+        pc, steps, last = _run_bytecode(*self.bytecode, regs, self.memory, flags,
+                                        self.pc, max_steps)
+        
+        self.regs = [int(r) for r in regs]
+        self.flag_z, self.flag_s = int(flags[0]), int(flags[1])
+        self.pc = int(pc)
+        self.executed_count += steps
+        if last >= 0:
+            self.ir = self.program[last]
+        return steps
+    
+    def build_blocks(self):
+        """Разбить программу на базовые блоки"""
+        n = len(self.program)
+        leaders = {0}
+        for i, inst in enumerate(self.program):
+            if inst.op_id in self.BRANCH_OPS:
+                leaders.add(i + 1)
+                if inst.m1 == self.ADDRESSING_MODES['imm']:
+                    leaders.add(inst.v1)
+        
+        self.block_program = []
+        self.block_pc = [-1] * n
+        bb = None
+        for i, inst in enumerate(self.program):
+            if bb is None or i in leaders:
+                bb = BasicBlock(i, i, 0, [], [])
+                self.block_pc[i] = len(self.block_program)
+                self.block_program.append(bb)
+            
+            prev = bb.ops[-1][1] if bb.ops else None
+            if inst.op_id == self.OPCODES['jnz'] and prev is not None and self.is_dec_by_one(prev):
+                # Цикл со счётчиком: sub reg 1 + jnz сливаются в одну команду
+                fused = Instruction('djnz', prev.operand1, inst.operand1,
+                                    f"{prev.raw}; {inst.raw}", self.DJNZ,
+                                    prev.m1, prev.v1, inst.m1, inst.v1)
+                self.bind_operands(fused)
+                fused.target = inst.target
+                bb.ops[-1] = (self._op_djnz, fused)
+            else:
+                bb.ops.append((self.dispatch[inst.op_id], inst))
+                bb.pcs.append(i)
+            bb.last = i
+            bb.count += 1
+        
+        for bb in self.block_program:
+            self.drop_dead_flags(bb)
+    
+    def drop_dead_flags(self, bb: BasicBlock):
+        """Отключить запись флагов, перезаписываемых в том же блоке до чтения.
+        
+        На границах блоков флаги всегда актуальны, поэтому остановка по
+        лимиту команд или между порциями выполнения их не искажает.
+        Пошаговое выполнение использует исходные команды.
+        """
+        live = True
+        for k in range(len(bb.ops) - 1, -1, -1):
+            handler, inst = bb.ops[k]
+            if inst.op_id in self.FLAG_READERS:
+                live = True
+            elif inst.op_id in self.FLAG_WRITERS or inst.op_id == self.DJNZ:
+                if not live:
+                    inst = copy.copy(inst)
+                    inst.write_flags = False
+                    bb.ops[k] = (handler, inst)
+                live = False
+    
+    def restore_dead_flags(self, bb: BasicBlock, k: int):
+        """Выставить флаги, как если бы команды блока до k-й писали их всегда"""
+        for handler, inst in reversed(bb.ops[:k]):
+            if inst.op_id in self.FLAG_WRITERS or inst.op_id == self.DJNZ:
+                if not inst.write_flags:
+                    self.update_flags(self.dead_result)
+                return
+    
+    def is_dec_by_one(self, inst: Instruction) -> bool:
+        """Проверить, что команда имеет вид sub reg 1"""
+        return (inst.op_id == self.OPCODES['sub']
+                and inst.m1 == self.ADDRESSING_MODES['reg']
+                and inst.m2 == self.ADDRESSING_MODES['imm'] and inst.v2 == 1)
+    
+    def run_interpreted(self, max_steps: int) -> int:
+        """Выполнить программу интерпретатором по базовым блокам"""
+        steps = 0
+        if self.block_program is None:
+            self.build_blocks()
+        
+        # Состояние цикла держим в локальных переменных и
+        # записываем обратно в атрибуты только при выходе
+        blocks = self.block_program
+        block_pc = self.block_pc
+        program = self.program
+        nprog = len(program)
+        pc = self.pc
+        running = self.running
+        ir = self.ir
+        executed = 0
+        
+        while running and pc < nprog and steps < max_steps:
+            b = block_pc[pc] if pc >= 0 else -1
+            if b < 0 or steps + blocks[b].count > max_steps:
+                # Вход в середину блока (косвенный переход) или остаток лимита
+                self.pc, self.ir = pc, ir
+                self.execute_step()
+                pc, running, ir = self.pc, self.running, self.ir
+                steps += 1
+                continue
+            
+            bb = blocks[b]
+            # Линейные команды не трогают pc, поэтому ветвление в конце блока
+            # видит собственный адрес, как при выполнении через execute_step
+            self.pc = bb.last
+            try:
+                for k, (handler, inst) in enumerate(bb.ops):
+                    handler(inst)
+            except Exception as e:
+                # Останавливаемся на упавшей команде, как execute_step;
+                # команды блока до неё уже выполнены
+                self.error_msg = f"Ошибка выполнения: {str(e)}"
+                self.restore_dead_flags(bb, k)
+                pc = bb.pcs[k]
+                ir = program[pc]
+                executed += pc - bb.start
+                running = False
+                break
+            pc = self.pc + 1
+            ir = program[bb.last]
+            steps += bb.count
+            executed += bb.count
+        
+        self.pc = pc
+        self.running = running
+        self.ir = ir
+        self.executed_count += executed
+        return steps
+    
     def run_auto(self, max_steps: int = 10000) -> bool:
         """Автоматическое выполнение программы"""
-        steps = 0
-        while self.running and self.pc < len(self.program) and steps < max_steps:
-            self.execute_step()
-            steps += 1
+        # Остановка по лимиту в прошлом вызове не мешает продолжить,
+        # ошибкой этого вызова считается только новое сообщение
+        if self.error_msg == "Превышен лимит команд":
+            self.error_msg = None
+        previous_error = self.error_msg
         
+        steps = 0
+        if self.use_compiled and self.running and self.can_run_compiled():
+            steps = self.run_compiled(max_steps)
+        # Остаток после остановки скомпилированного цикла (переполнение int64,
+        # отрицательный pc) или вся программа без Numba
+        if steps < max_steps:
+            steps += self.run_interpreted(max_steps - steps)
+        
+        if self.error_msg != previous_error:
+            return False
         if steps >= max_steps:
             self.error_msg = "Превышен лимит команд"
             return False
@@ -298,11 +726,18 @@ class Emulator:
 class EmulatorGUI:
     """Графический интерфейс эмулятора"""
     
+    # Автоматическое выполнение идёт порциями, между которыми
+    # обновляется интерфейс и обрабатываются события Tk
+    RUN_LIMIT = 10000
+    RUN_CHUNK = 500
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Эмулятор Процессора - Гарвардская архитектура")
         self.root.geometry("1400x900")
         self.emulator = Emulator()
+        self.run_job = None
+        self.mem_snapshot = None
         
         self.setup_styles()
         self.create_widgets()
@@ -378,11 +813,11 @@ class EmulatorGUI:
         # Регистры общего назначения
         ttk.Label(left_frame, text="Регистры ОП:", font=self.header_font).pack(anchor=tk.W)
         
+        self.reg_vars = {}
         for reg in ['eax', 'ebx', 'ecx', 'edx']:
             frame = ttk.Frame(left_frame)
             frame.pack(fill=tk.X, pady=2)
             ttk.Label(frame, text=f"{reg.upper()}:", width=6, font=self.label_font).pack(side=tk.LEFT)
-            self.reg_vars = getattr(self, 'reg_vars', {})
             var = tk.StringVar(value="0")
             self.reg_vars[reg] = var
             ttk.Label(frame, textvariable=var, font=self.mono_font, 
@@ -493,8 +928,8 @@ class EmulatorGUI:
     def update_display(self):
         """Обновить отображение интерфейса"""
         # Обновить регистры
-        for reg in ['eax', 'ebx', 'ecx', 'edx']:
-            self.reg_vars[reg].set(str(self.emulator.registers[reg]))
+        for i, reg in enumerate(self.emulator.REG_NAMES):
+            self.reg_vars[reg].set(str(self.emulator.regs[i]))
         
         # Обновить ПК и ИР
         self.pc_var.set(str(self.emulator.pc))
@@ -506,28 +941,18 @@ class EmulatorGUI:
             self.bin_var.set("-")
         
         # Обновить флаги
-        z_val = str(self.emulator.flags['z'])
-        s_val = str(self.emulator.flags['s'])
+        z_val = str(self.emulator.flag_z)
+        s_val = str(self.emulator.flag_s)
         self.flag_z_var.set(z_val)
         self.flag_s_var.set(s_val)
         
-        fg_z = "green" if self.emulator.flags['z'] == 1 else "red"
-        fg_s = "green" if self.emulator.flags['s'] == 1 else "red"
+        fg_z = "green" if self.emulator.flag_z == 1 else "red"
+        fg_s = "green" if self.emulator.flag_s == 1 else "red"
         self.flag_z_label.config(foreground=fg_z)
         self.flag_s_label.config(foreground=fg_s)
         
         # Обновить память
-        self.memory_text.config(state=tk.NORMAL)
-        self.memory_text.delete(1.0, tk.END)
-        self.memory_text.insert(tk.END, "Адр    Значение\n")
-        self.memory_text.insert(tk.END, "-" * 20 + "\n")
-        
-        if self.emulator.memory:
-            for addr in sorted(self.emulator.memory.keys())[:30]:
-                val = self.emulator.memory[addr]
-                self.memory_text.insert(tk.END, f"[{addr:3d}]  {val:6d}\n")
-        
-        self.memory_text.config(state=tk.DISABLED)
+        self.update_memory_view()
         
         # Статус
         if self.emulator.running:
@@ -538,10 +963,43 @@ class EmulatorGUI:
             self.status_var.set("Остановлено")
         
         self.exec_var.set(str(self.emulator.executed_count))
-        self.result_var.set(str(self.emulator.registers['eax']))
+        self.result_var.set(str(self.emulator.regs[0]))
+    
+    def update_memory_view(self):
+        """Обновить панель памяти, перерисовывая только изменившиеся ячейки"""
+        memory = self.emulator.memory
+        current = {addr: int(memory[addr]) for addr in np.nonzero(memory)[0][:30].tolist()}
+        shown = self.mem_snapshot
+        if current == shown:
+            return
+        
+        self.memory_text.config(state=tk.NORMAL)
+        addrs = list(current)
+        if shown is not None and list(shown) == addrs[:len(shown)]:
+            # Набор ячеек только пополнился: правим изменённые строки,
+            # новые дописываем в конец одной вставкой
+            appended = []
+            for line, addr in enumerate(addrs, start=3):
+                val = current[addr]
+                if addr not in shown:
+                    appended.append(f"[{addr:3d}]  {val:6d}\n")
+                elif shown[addr] != val:
+                    self.memory_text.replace(f"{line}.0", f"{line}.end",
+                                             f"[{addr:3d}]  {val:6d}")
+            if appended:
+                self.memory_text.insert(tk.END, "".join(appended))
+        else:
+            # Полная перерисовка одной вставкой вместо вставки по строкам
+            lines = [f"[{addr:3d}]  {val:6d}\n" for addr, val in current.items()]
+            self.memory_text.delete(1.0, tk.END)
+            self.memory_text.insert(tk.END, "Адр    Значение\n" + "-" * 20 + "\n" + "".join(lines))
+        
+        self.memory_text.config(state=tk.DISABLED)
+        self.mem_snapshot = current
     
     def load_program(self):
         """Загрузить программу"""
+        self.stop_run()
         code = self.program_input.get(1.0, tk.END)
         self.console.config(state=tk.NORMAL)
         self.console.delete(1.0, tk.END)
@@ -575,16 +1033,39 @@ class EmulatorGUI:
         if not self.emulator.running:
             self.log_console("Ошибка: программа не загружена", 'error')
             return
+        if self.run_job is not None:
+            return
+        
+        self.run_chunk(self.RUN_LIMIT)
+    
+    def run_chunk(self, remaining: int):
+        """Выполнить порцию команд и запланировать следующую"""
+        self.run_job = None
+        chunk = min(self.RUN_CHUNK, remaining)
         
-        if self.emulator.run_auto():
+        if self.emulator.run_auto(max_steps=chunk):
             self.log_console(f" Выполнено {self.emulator.executed_count} команд", 'success')
+        elif self.emulator.running and remaining > chunk:
+            # Порция исчерпана без ошибки, а общий лимит ещё не достигнут
+            self.emulator.error_msg = None
+            self.update_display()
+            self.root.update_idletasks()
+            self.run_job = self.root.after(0, self.run_chunk, remaining - chunk)
+            return
         else:
             self.log_console(f"{self.emulator.error_msg}", 'error')
         
         self.update_display()
     
+    def stop_run(self):
+        """Прервать запланированное автоматическое выполнение"""
+        if self.run_job is not None:
+            self.root.after_cancel(self.run_job)
+            self.run_job = None
+    
     def reset(self):
         """Сброс эмулятора"""
+        self.stop_run()
         self.emulator.reset()
         self.console.config(state=tk.NORMAL)
         self.console.delete(1.0, tk.END)
@@ -594,6 +1075,7 @@ class EmulatorGUI:
     
     def load_task1(self):
         """Загрузить задачу 1: Сумма элементов массива"""
+        self.stop_run()
         program = """mov [0] 6
 mov [1] 100
 mov [2] 2
@@ -624,6 +1106,7 @@ jnz 8"""
     
     def load_task2(self):
         """Загрузить задачу 2: Свертка двух массивов"""
+        self.stop_run()
         program = """mov [0] 10
 mov [1] 1
 mov [2] 1